@@ -1,6 +1,9 @@
 import streamlit as st
+from streamlit.runtime import Runtime
+from streamlit.runtime.app_session import AppSessionState
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 import pandas as pd
 import json
 import os
@@ -10,9 +13,21 @@ import cloudinary.api
 from pyzbar.pyzbar import decode
 import numpy as np
 import requests
+import uuid
+import re
+import threading
+import weakref
+import atexit
+import logging
+from collections import OrderedDict
+import csv
+import tempfile
+import zipfile
+import pyarrow as pa
+import pyarrow.parquet as pq
 # Neue Imports: Barcode Scanner
 import base64
-from io import BytesIO
+from io import BytesIO, TextIOWrapper
 from PIL import Image
 
 # Cloudinary Konfiguration
@@ -22,13 +37,15 @@ cloudinary.config(
     api_secret=st.secrets["cloudinary"]["api_secret"]
 )
 
+logger = logging.getLogger(__name__)
+
 # Initialize session state
 if 'current_page' not in st.session_state:
     st.session_state.current_page = "Dashboard"
-if 'data_loaded' not in st.session_state:
-    st.session_state.data_loaded = False
-if 'activity_feed' not in st.session_state:
-    st.session_state.activity_feed = []
+if 'party_id' not in st.session_state:
+    st.session_state.party_id = None
+if 'submission_keys' not in st.session_state:
+    st.session_state.submission_keys = {}
 if 'barcode_result' not in st.session_state:
     st.session_state.barcode_result = None
 if 'last_scan_time' not in st.session_state:
@@ -66,6 +83,61 @@ SUGGESTED_DRINKS = {
 # Konstanten für Beziehungsstatus
 STATUS_OPTIONS = ["Vergeben", "Single", "Unentschlossen"]
 
+# Spalten des flachen Getränke-DataFrames für die Analyse
+DRINKS_DF_COLUMNS = ['person', 'gender', 'type', 'time', 'datetime',
+                     'volume', 'alcohol_content', 'pure_alcohol']
+
+# Intervall für die zeitliche Auswertung
+ANALYTICS_BUCKET = "15min"
+
+# Multi-Party: Standard-Party (alte Einzel-Party) und Grenzen des Party-Caches
+DEFAULT_PARTY_ID = "silvester2024"
+PARTY_ID_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,39}$")
+PARTIES_DIR = "parties"
+PARTY_CACHE_SIZE = 8
+PARTY_IDLE_SECONDS = 30 * 60
+
+# Abfrageintervall (Sekunden) für Änderungen an Party-Dateien durch andere Prozesse
+PARTY_WATCH_INTERVAL = 1.0
+# Abstand (Sekunden), in dem ein zurückgestelltes Live-Update erneut zugestellt wird
+WAKE_RETRY_INTERVAL = 1.0
+
+# Write-Behind: Änderungen innerhalb dieses Zeitfensters (Sekunden) werden gemeinsam gespeichert
+WRITE_BEHIND_WINDOW = 0.5
+# Wartezeit (Sekunden) bis zum nächsten Versuch nach Schreibfehlern, verdoppelt sich bis zum Maximum
+WRITE_RETRY_MAX = 60.0
+# Wie oft ein Schreibvorgang nach Änderungen anderer Prozesse neu zusammengeführt wird
+WRITE_CONFLICT_RETRIES = 3
+# Anzahl der gemerkten Idempotenz-Schlüssel pro Party
+IDEMPOTENCY_KEY_LIMIT = 500
+
+# Erwartete Spalten für den CSV-Import
+PARTICIPANT_IMPORT_COLUMNS = ['name', 'weight', 'gender', 'status', 'instagram']
+DRINK_IMPORT_COLUMNS = ['name', 'type', 'time', 'volume', 'alcohol_content']
+# Deutsche Datumsformate für Nachträge (ISO wird zusätzlich akzeptiert)
+DRINK_TIME_FORMATS = ['%d.%m.%Y %H:%M', '%d.%m.%Y %H:%M:%S', '%d.%m.%y %H:%M']
+
+# Schemas für den Parquet-Export
+PARTICIPANT_EXPORT_SCHEMA = pa.schema([
+    ('name', pa.string()),
+    ('weight', pa.float64()),
+    ('gender', pa.string()),
+    ('status', pa.string()),
+    ('instagram', pa.string()),
+    ('drinks', pa.int64())
+])
+ACTIVITY_EXPORT_SCHEMA = pa.schema([
+    ('timestamp', pa.timestamp('s')),
+    ('type', pa.string()),
+    ('person', pa.string()),
+    ('drink', pa.string()),
+    ('bac', pa.float64()),
+    ('message', pa.string())
+])
+
+# Anzahl Zeilen pro Batch beim Export
+EXPORT_BATCH_SIZE = 500
+
 # Barcode Scanner für Mobile
 def mobile_barcode_scanner():
     st.write("##### Option 1: Barcode scannen")
@@ -151,47 +223,462 @@ def get_drink_info_from_barcode(barcode):
         st.error(f"Fehler beim Abrufen der Produktinformationen: {e}")
     return None
 
-def save_data():
-    """Speichert alle Daten in einer JSON-Datei"""
-    data = {
-        'participants': st.session_state.participants,
-        'party_start_time': st.session_state.party_start_time
+def get_party_config(party_id):
+    """Liefert Datenspeicher, Memory-Prefix und Admin-Passwort einer Party"""
+    if not party_id or not PARTY_ID_PATTERN.match(party_id):
+        return None
+    parties = st.secrets.get("parties", {})
+    if party_id == DEFAULT_PARTY_ID:
+        # Die ursprüngliche Silvester-Party behält ihre bisherigen Speicherorte
+        config = parties.get(party_id, {})
+        return {
+            'title': config.get('title', "Silvester Party 2024"),
+            'data_file': config.get('data_file', 'party_data.json'),
+            'memory_prefix': config.get('memory_prefix', 'party_memories/'),
+            'admin_password': config.get('admin_password', "Silvester2024")
+        }
+    if party_id not in parties:
+        return None
+    config = parties[party_id]
+    return {
+        'title': config.get('title', party_id),
+        'data_file': config.get('data_file', os.path.join(PARTIES_DIR, f"{party_id}.json")),
+        'memory_prefix': config.get('memory_prefix', f"party_memories_{party_id}/"),
+        'admin_password': config.get('admin_password')
     }
-    with open('party_data.json', 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False)
 
-def load_data():
-    """Lädt die Daten aus der JSON-Datei"""
+class PartyStore:
+    """Im Speicher gehaltener Zustand einer Party, geteilt von allen Sessions"""
+    def __init__(self, party_id, config):
+        self.party_id = party_id
+        self.config = config
+        self.lock = threading.RLock()
+        self.write_lock = threading.Lock()
+        self.participants = {}
+        self.party_start_time = time.time()
+        self.activity_feed = []
+        self.drinks_df = pd.DataFrame(columns=DRINKS_DF_COLUMNS)
+        self.pending_drink_rows = []
+        self.data_version = uuid.uuid4().hex
+        self.dirty = False
+        self.pending_writes = 0
+        self.applied_keys = OrderedDict()
+        self.removed_drinks = set()
+        self.file_signature = None
+        self.last_access = time.time()
+
+class PartyStoreCache:
+    """Begrenzter LRU-Cache, der Partys beim ersten Zugriff lädt und inaktive verdrängt"""
+    def __init__(self, max_size, idle_seconds):
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self._stores = OrderedDict()
+        # Verdrängte Stores, die noch jemand benutzt (laufendes Skript, Writer, Flush).
+        # Sie werden wiederverwendet statt neu geladen, damit es nie zwei Stores pro Party gibt.
+        self._evicted = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, party_id):
+        with self._lock:
+            store = self._stores.get(party_id)
+            if store is None:
+                store = self._evicted.pop(party_id, None)
+                if store is None:
+                    store = PartyStore(party_id, get_party_config(party_id))
+                    load_data(store)
+                self._stores[party_id] = store
+            else:
+                self._stores.move_to_end(party_id)
+            store.last_access = time.time()
+            evicted = self._evict(keep=party_id)
+        # Verdrängte Partys außerhalb des Cache-Locks schreiben, damit andere Sessions nicht warten
+        for evicted_store in evicted:
+            flush_party(evicted_store)
+        return store
+
+    def _evict(self, keep):
+        # Älteste zuerst: erst alles über der Maximalgröße, dann inaktive Partys
+        now = time.time()
+        evicted = []
+        for party_id in list(self._stores):
+            store = self._stores[party_id]
+            too_many = len(self._stores) > self.max_size
+            idle = now - store.last_access > self.idle_seconds
+            if party_id == keep or not (too_many or idle):
+                continue
+            store = self._stores.pop(party_id)
+            self._evicted[party_id] = store
+            evicted.append(store)
+        return evicted
+
+    def stores(self):
+        with self._lock:
+            return list(self._stores.values())
+
+    def __len__(self):
+        return len(self._stores)
+
+class PartyChannel:
+    """In-Process Publish/Subscribe: weckt Sessions, sobald sich ihre Party ändert"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._subscribers = {}
+        self._deferred = set()
+
+    def version(self, party_id):
+        with self._lock:
+            return self._versions.get(party_id, 0)
+
+    def subscribe(self, party_id, session_id):
+        with self._lock:
+            for subscribers in self._subscribers.values():
+                subscribers.discard(session_id)
+            self._subscribers.setdefault(party_id, set()).add(session_id)
+
+    def unsubscribe(self, session_id):
+        with self._lock:
+            for subscribers in self._subscribers.values():
+                subscribers.discard(session_id)
+
+    def publish(self, party_id, exclude=None):
+        with self._lock:
+            self._versions[party_id] = self._versions.get(party_id, 0) + 1
+            subscribers = set(self._subscribers.get(party_id, ()))
+        for session_id in subscribers - {exclude}:
+            session = get_app_session(session_id)
+            if session is None:
+                self.unsubscribe(session_id)
+                continue
+            # Der ScriptRunner gehört zur Event-Loop der Session, daher dort zustellen
+            session._event_loop.call_soon_threadsafe(self._deliver, session)
+
+    def take_deferred(self, session_id):
+        """Holt ein während des laufenden Skripts zurückgestelltes Update ab"""
+        with self._lock:
+            if session_id in self._deferred:
+                self._deferred.discard(session_id)
+                return True
+            return False
+
+    def _deliver(self, session):
+        # Ein laufendes Skript nicht unterbrechen: sonst würde Streamlit einen
+        # gerade geklickten Button im Rerun erneut auslösen
+        if session._state == AppSessionState.APP_IS_RUNNING:
+            with self._lock:
+                self._deferred.add(session.id)
+            session._event_loop.call_later(WAKE_RETRY_INTERVAL, self._deliver_deferred, session)
+            return
+        session.request_rerun(None)
+
+    def _deliver_deferred(self, session):
+        # Fallback, falls das Skript schon vor dem Zurückstellen fertig war
+        with self._lock:
+            if session.id not in self._deferred:
+                return
+        if session._state == AppSessionState.APP_IS_RUNNING:
+            session._event_loop.call_later(WAKE_RETRY_INTERVAL, self._deliver_deferred, session)
+            return
+        if self.take_deferred(session.id):
+            session.request_rerun(None)
+
+class PartyFileWatcher(threading.Thread):
+    """Erkennt Änderungen anderer Prozesse an den Party-Dateien und lädt neu"""
+    def __init__(self, cache, channel, interval):
+        super().__init__(name="party-file-watcher", daemon=True)
+        self.cache = cache
+        self.channel = channel
+        self.interval = interval
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            for store in self.cache.stores():
+                with store.lock:
+                    signature = get_file_signature(store.config['data_file'])
+                    # Eigene, noch nicht geschriebene Änderungen führt der Writer zusammen
+                    if signature == store.file_signature or store.pending_writes:
+                        continue
+                    try:
+                        data = read_party_file(store.config['data_file'])
+                    except Exception as e:
+                        # Evtl. halb geschrieben: Stand behalten, beim nächsten Durchlauf erneut versuchen
+                        logger.warning("Party %s konnte nicht neu geladen werden: %s", store.party_id, e)
+                        continue
+                    apply_party_data(store, data, signature)
+                self.channel.publish(store.party_id)
+
+class PartyWriter(threading.Thread):
+    """Schreibt geänderte Partys im Hintergrund, mehrere Änderungen pro Schreibvorgang"""
+    def __init__(self, window):
+        super().__init__(name="party-writer", daemon=True)
+        self.window = window
+        self._condition = threading.Condition()
+        self._queue = OrderedDict()
+        self._failures = {}
+
+    def schedule(self, party):
+        with self._condition:
+            self._queue[party.party_id] = party
+            self._condition.notify()
+
+    def queue_depth(self):
+        with self._condition:
+            return len(self._queue)
+
+    def run(self):
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+            # Group Commit: weitere Änderungen im Zeitfenster sammeln
+            time.sleep(self.window)
+            self.flush()
+
+    def flush(self):
+        with self._condition:
+            stores = list(self._queue.values())
+            self._queue.clear()
+        for store in stores:
+            try:
+                write_party_file(store)
+            except Exception as e:
+                failures = self._failures.get(store.party_id, 0) + 1
+                self._failures[store.party_id] = failures
+                delay = min(WRITE_RETRY_MAX, self.window * 2 ** failures)
+                if failures == 1:
+                    logger.exception("Party %s konnte nicht gespeichert werden, neuer Versuch in %.1f s",
+                                     store.party_id, delay)
+                else:
+                    logger.warning("Party %s weiterhin nicht gespeichert (%d. Versuch): %s",
+                                   store.party_id, failures, e)
+                retry = threading.Timer(delay, self.schedule, args=(store,))
+                retry.daemon = True
+                retry.start()
+            else:
+                self._failures.pop(store.party_id, None)
+
+def get_file_signature(path):
+    """Änderungszeit und Größe einer Datei (None, wenn sie nicht existiert)"""
     try:
-        if os.path.exists('party_data.json'):
-            with open('party_data.json', 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                st.session_state.participants = data.get('participants', {})
-                st.session_state.party_start_time = data.get('party_start_time', time.time())
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def get_session_id():
+    """ID der aktuellen Browser-Session"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+def get_app_session(session_id):
+    """Gibt die aktive Streamlit-Session zurück oder None (nutzt Streamlit-Interna)"""
+    try:
+        session_info = Runtime.instance()._session_mgr.get_active_session_info(session_id)
+    except Exception:
+        return None
+    return session_info.session if session_info else None
+
+@st.cache_resource
+def get_party_cache():
+    """Prozessweiter Cache aller geladenen Partys"""
+    return PartyStoreCache(PARTY_CACHE_SIZE, PARTY_IDLE_SECONDS)
+
+@st.cache_resource
+def get_party_channel():
+    """Prozessweiter Benachrichtigungskanal für Party-Änderungen"""
+    return PartyChannel()
+
+@st.cache_resource
+def get_party_writer():
+    """Startet einmal pro Prozess den Hintergrund-Writer, der beim Beenden alles schreibt"""
+    writer = PartyWriter(WRITE_BEHIND_WINDOW)
+    writer.start()
+    atexit.register(flush_all_parties, get_party_cache())
+    return writer
+
+@st.cache_resource
+def start_party_watcher():
+    """Startet einmal pro Prozess die Überwachung der Party-Dateien"""
+    watcher = PartyFileWatcher(get_party_cache(), get_party_channel(), PARTY_WATCH_INTERVAL)
+    watcher.start()
+    return watcher
+
+def get_party():
+    """Gibt den Store der Party dieser Session zurück"""
+    return get_party_cache().get(st.session_state.party_id)
+
+def notify_party_changed(party):
+    """Weckt alle anderen Sessions, die diese Party live verfolgen"""
+    get_party_channel().publish(party.party_id, exclude=get_session_id())
+
+def save_data(party):
+    """Merkt eine Änderung zum Speichern vor, ohne auf die Festplatte zu warten"""
+    with party.lock:
+        party.dirty = True
+        party.pending_writes += 1
+    get_party_writer().schedule(party)
+    notify_party_changed(party)
+
+def write_party_file(party):
+    """Schreibt alle Daten einer Party atomar in ihre JSON-Datei"""
+    data_file = party.config['data_file']
+    merged = False
+    with party.write_lock:
+        for _ in range(WRITE_CONFLICT_RETRIES):
+            with party.lock:
+                if not party.dirty:
+                    return
+                payload = json.dumps({
+                    'participants': party.participants,
+                    'party_start_time': party.party_start_time,
+                    'activity_feed': party.activity_feed
+                }, ensure_ascii=False)
+                written = party.pending_writes
+                removed = set(party.removed_drinks)
+                party.dirty = False
+            try:
+                os.makedirs(os.path.dirname(data_file) or '.', exist_ok=True)
+                with open(f"{data_file}.tmp", 'w', encoding='utf-8') as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                with party.lock:
+                    signature = get_file_signature(data_file)
+                    if signature != party.file_signature:
+                        # Ein anderer Prozess hat die Datei geändert: seinen Stand
+                        # übernehmen, die eigenen Änderungen darauf anwenden, neu schreiben
+                        logger.warning("Party %s wurde von einem anderen Prozess geändert, führe zusammen",
+                                       party.party_id)
+                        merge_party_data(party, read_party_file(data_file), signature)
+                        party.dirty = True
+                        merged = True
+                        continue
+                    os.replace(f"{data_file}.tmp", data_file)
+                    party.file_signature = get_file_signature(data_file)
+                    party.pending_writes -= written
+                    party.removed_drinks -= removed
+            except Exception:
+                # Auch ein fehlgeschlagenes Umbenennen muss erneut geschrieben werden
+                with party.lock:
+                    party.dirty = True
+                raise
+            break
         else:
-            st.session_state.participants = {}
-            st.session_state.party_start_time = time.time()
+            raise RuntimeError(f"Party {party.party_id}: Datei ändert sich ständig, Schreiben verschoben")
+    if merged:
+        # Zusammengeführte Daten anderer Prozesse auch in den offenen Sessions zeigen
+        get_party_channel().publish(party.party_id)
+
+def flush_party(party):
+    """Schreibt ungespeicherte Änderungen einer Party, wartet auf laufende Schreibvorgänge"""
+    # write_party_file prüft "dirty" erst unter dem write_lock, sonst würde ein
+    # gerade laufender Schreibvorgang (dirty schon False) nicht abgewartet
+    write_party_file(party)
+
+def flush_all_parties(cache):
+    """Schreibt beim Beenden alle geladenen Partys, auch wenn der Writer sie schon übernommen hat"""
+    for store in cache.stores():
+        try:
+            flush_party(store)
+        except Exception:
+            logger.exception("Party %s konnte beim Beenden nicht gespeichert werden", store.party_id)
+
+def claim_submission(party, key):
+    """Merkt sich einen Idempotenz-Schlüssel, False bei doppelter Übermittlung"""
+    with party.lock:
+        if key in party.applied_keys:
+            return False
+        party.applied_keys[key] = time.time()
+        while len(party.applied_keys) > IDEMPOTENCY_KEY_LIMIT:
+            party.applied_keys.popitem(last=False)
+        return True
+
+def is_submission_claimed(party, key):
+    """Prüft, ob ein Idempotenz-Schlüssel bereits verarbeitet wurde"""
+    with party.lock:
+        return key in party.applied_keys
+
+def get_submission_key(form):
+    """Idempotenz-Schlüssel für die aktuell angezeigte Version eines Formulars"""
+    if form not in st.session_state.submission_keys:
+        st.session_state.submission_keys[form] = uuid.uuid4().hex
+    return st.session_state.submission_keys[form]
+
+def rotate_submission_key(form):
+    """Erzeugt nach einer Übermittlung einen neuen Schlüssel (und damit neue Widgets)"""
+    st.session_state.submission_keys[form] = uuid.uuid4().hex
+
+def read_party_file(data_file):
+    """Liest eine Party-Datei, ohne einen Store zu verändern"""
+    if not os.path.exists(data_file):
+        return {'participants': {}, 'party_start_time': time.time(), 'activity_feed': []}
+    with open(data_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return {
+        'participants': data.get('participants', {}),
+        'party_start_time': data.get('party_start_time', time.time()),
+        'activity_feed': data.get('activity_feed', [])
+    }
+
+def apply_party_data(party, data, signature):
+    """Übernimmt vollständig gelesene Daten in den Store"""
+    with party.lock:
+        party.participants = data['participants']
+        party.party_start_time = data['party_start_time']
+        party.activity_feed = data['activity_feed']
+        party.removed_drinks = set()
+        party.file_signature = signature
+        rebuild_drinks_df(party)
+
+def merge_party_data(party, data, signature):
+    """Führt den Dateistand eines anderen Prozesses mit den eigenen Änderungen zusammen"""
+    with party.lock:
+        for name, person in data['participants'].items():
+            local = party.participants.get(name)
+            if local is None:
+                party.participants[name] = person
+                continue
+            # Getränke sind über ihren Zeitstempel eindeutig, lokal gelöschte bleiben gelöscht
+            known = {drink['time'] for drink in local['drinks']}
+            local['drinks'].extend(
+                drink for drink in person['drinks']
+                if drink['time'] not in known and (name, drink['time']) not in party.removed_drinks
+            )
+            local['drinks'].sort(key=lambda d: d['time'])
+        seen = {(a['type'], a['timestamp']) for a in party.activity_feed}
+        party.activity_feed.extend(a for a in data['activity_feed'] if (a['type'], a['timestamp']) not in seen)
+        party.activity_feed.sort(key=lambda a: a['timestamp'], reverse=True)
+        del party.activity_feed[50:]
+        party.party_start_time = min(party.party_start_time, data['party_start_time'])
+        party.file_signature = signature
+        rebuild_drinks_df(party)
+
+def load_data(party):
+    """Lädt die Daten einer Party aus ihrer JSON-Datei"""
+    data_file = party.config['data_file']
+    signature = get_file_signature(data_file)
+    try:
+        data = read_party_file(data_file)
     except Exception as e:
+        # Der Store bleibt leer, der Watcher versucht es beim nächsten Durchlauf erneut
         st.error(f"Fehler beim Laden der Daten: {e}")
-        st.session_state.participants = {}
-        st.session_state.party_start_time = time.time()
+        return
+    apply_party_data(party, data, signature)
 
-def add_activity(activity_type, details):
+def add_activity(party, activity_type, details):
     """Fügt eine neue Aktivität zum Feed hinzu"""
-    if 'activity_feed' not in st.session_state:
-        st.session_state.activity_feed = []
-    
     activity = {
         'type': activity_type,
         'details': details,
         'timestamp': time.time()
     }
     
-    st.session_state.activity_feed.insert(0, activity)  # Neuste zuerst
+    party.activity_feed.insert(0, activity)  # Neuste zuerst
     
     # Beschränke Feed auf die letzten 50 Aktivitäten
-    if len(st.session_state.activity_feed) > 50:
-        st.session_state.activity_feed.pop()
+    if len(party.activity_feed) > 50:
+        party.activity_feed.pop()
 
 def get_activity_message(activity):
     """Generiert eine formatierte Nachricht für eine Aktivität"""
@@ -209,49 +696,56 @@ def get_activity_message(activity):
     
     elif activity['type'] == 'milestone':
         return f"🕒 {timestamp} | 🏆 {activity['details']['message']}"
+    
+    elif activity['type'] == 'import':
+        return f"🕒 {timestamp} | 📥 {activity['details']['message']}"
         
-def show_activity_feed():
+def show_activity_feed(party):
     """Zeigt den Activity Feed an"""
     st.markdown("### 🎯 Live Activity Feed")
     
-    if 'activity_feed' not in st.session_state or not st.session_state.activity_feed:
+    if not party.activity_feed:
         st.info("Noch keine Aktivitäten zu zeigen... Die Party kann beginnen! 🎉")
         return
     
     feed_container = st.container()
     with feed_container:
-        for activity in st.session_state.activity_feed:
+        for activity in list(party.activity_feed):
             message = get_activity_message(activity)
             if activity['type'] == 'milestone':
                 st.success(message)
-            elif activity['type'] == 'join':
+            elif activity['type'] in ('join', 'import'):
                 st.info(message)
             else:
                 st.write(message)
 
-def check_party_milestones():
+def check_party_milestones(party):
     """Prüft und fügt Party-weite Meilensteine hinzu"""
-    total_drinks = sum(len(p['drinks']) for p in st.session_state.participants.values())
+    total_drinks = sum(len(p['drinks']) for p in party.participants.values())
     
     if total_drinks in [50, 100, 150, 200]:
-        add_activity('milestone', {
+        add_activity(party, 'milestone', {
             'message': f"🎊 Die Party hat {total_drinks} Getränke erreicht!"
         })
 
-def remove_drink(participant_name, drink_index):
+def remove_drink(party, participant_name, drink_index, drink_time):
     """Entfernt ein Getränk von einem Teilnehmer"""
-    if participant_name in st.session_state.participants:
-        if 0 <= drink_index < len(st.session_state.participants[participant_name]['drinks']):
-            st.session_state.participants[participant_name]['drinks'].pop(drink_index)
-            save_data()
+    if participant_name in party.participants:
+        drinks = party.participants[participant_name]['drinks']
+        # Nur entfernen, wenn an der Stelle noch dasselbe Getränk steht (Doppel-Tipp)
+        if 0 <= drink_index < len(drinks) and drinks[drink_index]['time'] == drink_time:
+            drink = drinks.pop(drink_index)
+            party.removed_drinks.add((participant_name, drink['time']))
+            drop_drink_rows(party, participant_name, drink['time'])
+            save_data(party)
             return True
     return False
 
-def upload_memory(file, title):
+def upload_memory(party, file, title):
     """Lädt ein Bild oder Video zu Cloudinary hoch"""
     try:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        public_id = f"party_memories/{timestamp}_{title}"
+        public_id = f"{party.config['memory_prefix']}{timestamp}_{title}"
         
         result = cloudinary.uploader.upload(file,
             public_id=public_id,
@@ -262,12 +756,12 @@ def upload_memory(file, title):
         st.error(f"Upload fehlgeschlagen: {e}")
         return None
 
-def get_memories():
+def get_memories(party):
     """Holt alle gespeicherten Memories von Cloudinary"""
     try:
         result = cloudinary.api.resources(
             type="upload",
-            prefix="party_memories/",
+            prefix=party.config['memory_prefix'],
             max_results=500,
             resource_type="auto"
         )
@@ -288,18 +782,257 @@ def get_memories():
         st.error(f"Abruf der Memories fehlgeschlagen: {e}")
         return []
 
-def reset_party(password):
+def reset_party(party, password):
     """Reset der Party mit Passwortschutz"""
-    RESET_PASSWORD = "Silvester2024"
-    if password == RESET_PASSWORD:
-        if os.path.exists('party_data.json'):
-            os.remove('party_data.json')
-        st.session_state.participants = {}
-        st.session_state.party_start_time = time.time()
-        st.session_state.data_loaded = False
+    admin_password = party.config['admin_password']
+    if admin_password and password == admin_password:
+        with party.write_lock, party.lock:
+            if os.path.exists(party.config['data_file']):
+                os.remove(party.config['data_file'])
+            party.participants = {}
+            party.party_start_time = time.time()
+            party.activity_feed = []
+            party.dirty = False
+            party.pending_writes = 0
+            party.removed_drinks = set()
+            party.file_signature = None
+            rebuild_drinks_df(party)
+        notify_party_changed(party)
         return True
     return False
 
+def read_import_csv(file, required_columns):
+    """Liest eine Import-CSV ein und prüft die Spalten"""
+    try:
+        df = pd.read_csv(file, dtype=str, keep_default_na=False, skipinitialspace=True)
+    except Exception as e:
+        return None, [f"CSV-Datei konnte nicht gelesen werden: {e}"]
+    df.columns = [column.strip().lower() for column in df.columns]
+    missing = [column for column in required_columns if column not in df.columns]
+    if missing:
+        return None, [f"Fehlende Spalten: {', '.join(missing)}"]
+    return df, []
+
+def parse_number(value):
+    """Wandelt eine Zahl im deutschen oder englischen Format um"""
+    return float(str(value).strip().replace(',', '.'))
+
+def parse_drink_datetime(value):
+    """Wandelt ein Datum mit Uhrzeit (deutsch oder ISO) um, Tag immer vor Monat"""
+    for date_format in DRINK_TIME_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    # Wirft ValueError für alles, was auch kein ISO-Format ist
+    return datetime.fromisoformat(value)
+
+def parse_drink_time(party, value):
+    """Wandelt eine Uhrzeit (HH:MM) oder ein Datum mit Uhrzeit in einen Zeitstempel um"""
+    value = str(value).strip()
+    try:
+        clock = datetime.strptime(value, '%H:%M').time()
+    except ValueError:
+        return parse_drink_datetime(value).timestamp()
+    # Reine Uhrzeiten beziehen sich auf den Partystart, nach Mitternacht auf den Folgetag
+    party_start = datetime.fromtimestamp(party.party_start_time)
+    drink_time = datetime.combine(party_start.date(), clock)
+    if drink_time < party_start.replace(second=0, microsecond=0):
+        drink_time += timedelta(days=1)
+    return drink_time.timestamp()
+
+def parse_participant_import(party, file):
+    """Prüft einen Teilnehmer-Import vollständig, bevor etwas gespeichert wird"""
+    df, errors = read_import_csv(file, [c for c in PARTICIPANT_IMPORT_COLUMNS if c != 'instagram'])
+    if errors:
+        return {}, errors
+    
+    new_participants = {}
+    for line, row in enumerate(df.to_dict('records'), start=2):
+        name = row['name'].strip()
+        if not name:
+            errors.append(f"Zeile {line}: Name fehlt")
+            continue
+        if name in party.participants or name in new_participants:
+            errors.append(f"Zeile {line}: Teilnehmer '{name}' existiert bereits")
+            continue
+        try:
+            weight = parse_number(row['weight'])
+        except ValueError:
+            errors.append(f"Zeile {line}: Ungültiges Gewicht '{row['weight']}'")
+            continue
+        if not 40 <= weight <= 200:
+            errors.append(f"Zeile {line}: Gewicht muss zwischen 40 und 200 kg liegen")
+            continue
+        gender = row['gender'].strip().lower()
+        if gender not in ('männlich', 'weiblich'):
+            errors.append(f"Zeile {line}: Geschlecht muss 'männlich' oder 'weiblich' sein")
+            continue
+        status = row['status'].strip().capitalize()
+        if status not in STATUS_OPTIONS:
+            errors.append(f"Zeile {line}: Beziehungsstatus muss einer von {', '.join(STATUS_OPTIONS)} sein")
+            continue
+        
+        new_participants[name] = {
+            'weight': weight,
+            'gender': gender,
+            'status': status,
+            'instagram': row.get('instagram', '').strip(),
+            'drinks': []
+        }
+    
+    if not new_participants and not errors:
+        errors.append("Die CSV-Datei enthält keine Teilnehmer")
+    return new_participants, errors
+
+def parse_drink_import(party, file):
+    """Prüft einen Getränke-Import (Nachträge) vollständig, bevor etwas gespeichert wird"""
+    df, errors = read_import_csv(file, ['name', 'type', 'time'])
+    if errors:
+        return [], errors
+    
+    new_drinks = []
+    now = time.time()
+    for line, row in enumerate(df.to_dict('records'), start=2):
+        name = row['name'].strip()
+        if name not in party.participants:
+            errors.append(f"Zeile {line}: Unbekannter Teilnehmer '{name}'")
+            continue
+        try:
+            drink_time = parse_drink_time(party, row['time'])
+        except ValueError:
+            errors.append(f"Zeile {line}: Ungültige Uhrzeit '{row['time']}'")
+            continue
+        if drink_time > now:
+            errors.append(f"Zeile {line}: Uhrzeit liegt in der Zukunft")
+            continue
+        
+        drink_type = row['type'].strip()
+        if drink_type in DRINKS and drink_type != "Custom 🍾":
+            drink = {'type': drink_type, 'time': drink_time, 'custom': False}
+        else:
+            # Alles andere wird wie ein Custom Getränk mit Menge und Alkoholgehalt behandelt
+            try:
+                volume = parse_number(row.get('volume', ''))
+                alcohol = parse_number(row.get('alcohol_content', ''))
+            except ValueError:
+                errors.append(f"Zeile {line}: Custom Getränk '{drink_type}' braucht volume und alcohol_content")
+                continue
+            if not 1 <= volume <= 1000 or not 0 <= alcohol <= 99.9:
+                errors.append(f"Zeile {line}: Menge (1-1000 ml) oder Alkoholgehalt (0-99,9 %) ungültig")
+                continue
+            if not drink_type.startswith("Custom: "):
+                drink_type = f"Custom: {drink_type}"
+            drink = {
+                'type': drink_type,
+                'time': drink_time,
+                'custom': True,
+                'alcohol_content': alcohol / 100,
+                'volume': volume
+            }
+        new_drinks.append((name, drink))
+    
+    if not new_drinks and not errors:
+        errors.append("Die CSV-Datei enthält keine Getränke")
+    return new_drinks, errors
+
+def import_participants(party, new_participants):
+    """Übernimmt geprüfte Teilnehmer mit einem einzigen Speichervorgang"""
+    party.participants.update(new_participants)
+    add_activity(party, 'import', {
+        'message': f"{len(new_participants)} Gäste sind der Party beigetreten!"
+    })
+    save_data(party)
+
+def import_drinks(party, new_drinks):
+    """Übernimmt geprüfte Getränke-Nachträge mit einem einzigen Speichervorgang"""
+    for name, drink in new_drinks:
+        party.participants[name]['drinks'].append(drink)
+        append_drink_row(party, name, drink)
+    # Nachträge zeitlich einsortieren, da die BAC-Berechnung beim ersten Getränk startet
+    for name in {name for name, _ in new_drinks}:
+        party.participants[name]['drinks'].sort(key=lambda d: d['time'])
+    add_activity(party, 'import', {
+        'message': f"{len(new_drinks)} Getränke wurden nachgetragen"
+    })
+    save_data(party)
+
+def iter_participant_export_rows(party):
+    """Liefert die Teilnehmer Zeile für Zeile für den Export"""
+    for name, person in list(party.participants.items()):
+        yield {
+            'name': name,
+            'weight': float(person['weight']),
+            'gender': person['gender'],
+            'status': person['status'],
+            'instagram': person.get('instagram', ''),
+            'drinks': len(person['drinks'])
+        }
+
+def iter_activity_export_rows(party):
+    """Liefert den Activity Feed Zeile für Zeile für den Export"""
+    for activity in list(party.activity_feed):
+        details = activity['details']
+        yield {
+            'timestamp': datetime.fromtimestamp(activity['timestamp']),
+            'type': activity['type'],
+            'person': details.get('person'),
+            'drink': details.get('drink'),
+            'bac': details.get('bac'),
+            'message': get_activity_message(activity)
+        }
+
+def write_csv_rows(handle, rows, fieldnames):
+    """Schreibt Zeilen direkt in eine CSV-Datei im ZIP-Archiv"""
+    with TextIOWrapper(handle, encoding='utf-8', newline='') as text_handle:
+        writer = csv.DictWriter(text_handle, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def write_parquet_rows(handle, rows, schema):
+    """Schreibt Zeilen in Batches direkt in eine Parquet-Datei im ZIP-Archiv"""
+    with pq.ParquetWriter(handle, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+                batch = []
+        if batch:
+            writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+
+def export_party(party, export_format):
+    """Exportiert Teilnehmer, Getränke und Activity Feed als ZIP (CSV oder Parquet)"""
+    drinks_df, _ = get_drinks_df(party)
+    extension = 'csv' if export_format == 'CSV' else 'parquet'
+    
+    # Das Archiv entsteht auf der Festplatte, im Speicher landet es nur einmal als Bytes
+    with tempfile.TemporaryFile() as archive_file:
+        write_party_archive(party, archive_file, drinks_df, export_format, extension)
+        archive_file.seek(0)
+        return archive_file.read()
+
+def write_party_archive(party, archive_file, drinks_df, export_format, extension):
+    """Schreibt alle Export-Dateien nacheinander in das ZIP-Archiv"""
+    with zipfile.ZipFile(archive_file, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(f'participants.{extension}', 'w') as handle:
+            if export_format == 'CSV':
+                write_csv_rows(handle, iter_participant_export_rows(party), PARTICIPANT_EXPORT_SCHEMA.names)
+            else:
+                write_parquet_rows(handle, iter_participant_export_rows(party), PARTICIPANT_EXPORT_SCHEMA)
+        # Der Getränke-DataFrame existiert bereits und wird direkt geschrieben
+        with archive.open(f'drinks.{extension}', 'w') as handle:
+            if export_format == 'CSV':
+                with TextIOWrapper(handle, encoding='utf-8', newline='') as text_handle:
+                    drinks_df.to_csv(text_handle, index=False)
+            else:
+                drinks_df.to_parquet(handle, index=False)
+        with archive.open(f'activity_feed.{extension}', 'w') as handle:
+            if export_format == 'CSV':
+                write_csv_rows(handle, iter_activity_export_rows(party), ACTIVITY_EXPORT_SCHEMA.names)
+            else:
+                write_parquet_rows(handle, iter_activity_export_rows(party), ACTIVITY_EXPORT_SCHEMA)
+
 def get_status_emoji(status, gender):
     """Gibt das passende Status-Emoji zurück"""
     if status == "Vergeben":
@@ -313,6 +1046,13 @@ def format_bac(bac):
     """Formatiert den Promillewert im deutschen Format"""
     return f"{bac:.1f}".replace('.', ',')
 
+def get_pure_alcohol(drink):
+    """Berechnet die Menge reinen Alkohols (g) eines Getränks"""
+    if drink.get('custom', False):
+        return drink['volume'] * drink['alcohol_content'] * 0.789
+    drink_info = DRINKS[drink['type']]
+    return drink_info['volume'] * drink_info['alcohol_content'] * 0.789
+
 def calculate_bac(weight, gender, drinks):
     """
     Berechnet den Blutalkoholspiegel (BAC) nach der Widmark-Formel
@@ -327,14 +1067,7 @@ def calculate_bac(weight, gender, drinks):
     
     for drink in drinks:
         hours_passed = (current_time - drink['time']) / 3600
-        
-        if drink.get('custom', False):
-            pure_alcohol = drink['volume'] * drink['alcohol_content'] * 0.789
-        else:
-            drink_info = DRINKS[drink['type']]
-            pure_alcohol = drink_info['volume'] * drink_info['alcohol_content'] * 0.789
-            
-        total_alcohol += pure_alcohol
+        total_alcohol += get_pure_alcohol(drink)
 
     bac = (total_alcohol * 0.8) / (weight * r)
     
@@ -347,13 +1080,13 @@ def calculate_bac(weight, gender, drinks):
 
     return round(final_bac, 3)
 
-def get_participant_rankings():
+def get_participant_rankings(party):
     """Erstellt eine nach Promille sortierte Rangliste der Teilnehmer"""
-    if not st.session_state.participants:
+    if not party.participants:
         return []
     
     participant_data = []
-    for name, person in st.session_state.participants.items():
+    for name, person in list(party.participants.items()):
         bac = calculate_bac(person['weight'], person['gender'], person['drinks'])
         gender_icon = "🙋‍♂️" if person['gender'] == 'männlich' else "🙋‍♀️"
         status_icon = get_status_emoji(person['status'], person['gender'])
@@ -369,19 +1102,127 @@ def get_participant_rankings():
     
     return sorted(participant_data, key=lambda x: x['bac'], reverse=True)
 
-# Cache leeren
-st.cache_data.clear()
+def drink_to_row(name, person, drink):
+    """Wandelt ein Getränk in eine Zeile des Getränke-DataFrames um"""
+    if drink.get('custom', False):
+        volume, alcohol_content = drink['volume'], drink['alcohol_content']
+    else:
+        volume = DRINKS[drink['type']]['volume']
+        alcohol_content = DRINKS[drink['type']]['alcohol_content']
+    return {
+        'person': name,
+        'gender': person['gender'],
+        'type': drink['type'],
+        'time': drink['time'],
+        'datetime': datetime.fromtimestamp(drink['time']),
+        'volume': volume,
+        'alcohol_content': alcohol_content,
+        'pure_alcohol': get_pure_alcohol(drink)
+    }
+
+def bump_data_version(party):
+    """Markiert die Getränkedaten als geändert (neuer Cache-Schlüssel)"""
+    party.data_version = uuid.uuid4().hex
 
-# Load data if not already loaded
-if not st.session_state.data_loaded:
-    load_data()
-    st.session_state.data_loaded = True
+def rebuild_drinks_df(party):
+    """Baut den Getränke-DataFrame komplett aus den Teilnehmerdaten auf"""
+    with party.lock:
+        rows = [
+            drink_to_row(name, person, drink)
+            for name, person in party.participants.items()
+            for drink in person['drinks']
+        ]
+        party.drinks_df = pd.DataFrame(rows, columns=DRINKS_DF_COLUMNS)
+        party.pending_drink_rows = []
+        bump_data_version(party)
+
+def append_drink_row(party, name, drink):
+    """Hängt ein neues Getränk an den Getränke-DataFrame an"""
+    person = party.participants[name]
+    with party.lock:
+        party.pending_drink_rows.append(drink_to_row(name, person, drink))
+        bump_data_version(party)
+
+def get_drinks_df(party):
+    """Gibt den Getränke-DataFrame inkl. neuer Getränke und seine Datenversion zurück"""
+    with party.lock:
+        if party.pending_drink_rows:
+            new_rows = pd.DataFrame(party.pending_drink_rows, columns=DRINKS_DF_COLUMNS)
+            if party.drinks_df.empty:
+                party.drinks_df = new_rows
+            else:
+                party.drinks_df = pd.concat(
+                    [party.drinks_df, new_rows], ignore_index=True
+                )
+            party.pending_drink_rows = []
+        # Frame und Version gemeinsam lesen, damit der Cache-Schlüssel zum Inhalt passt
+        return party.drinks_df, party.data_version
+
+def drop_drink_rows(party, name, drink_time=None):
+    """Entfernt Getränke eines Teilnehmers (oder ein einzelnes) aus dem DataFrame"""
+    with party.lock:
+        df, _ = get_drinks_df(party)
+        mask = df['person'] == name
+        if drink_time is not None:
+            mask &= df['time'] == drink_time
+            # Bei gleicher Uhrzeit (z.B. Import) nur eine Zeile entfernen
+            mask &= mask.cumsum() <= 1
+        party.drinks_df = df[~mask].reset_index(drop=True)
+        bump_data_version(party)
+
+# Auswertungen werden pro Datenversion gecached. Der DataFrame selbst wird
+# nicht gehasht (führender Unterstrich), die Version dient als Schlüssel.
+@st.cache_data(max_entries=20)
+def get_drinks_per_bucket(_drinks_df, data_version):
+    """Anzahl Getränke pro 15-Minuten-Intervall"""
+    buckets = _drinks_df['datetime'].dt.floor(ANALYTICS_BUCKET)
+    counts = _drinks_df.groupby(buckets).size()
+    full_range = pd.date_range(counts.index.min(), counts.index.max(), freq=ANALYTICS_BUCKET)
+    return counts.reindex(full_range, fill_value=0).rename("Getränke")
+
+@st.cache_data(max_entries=20)
+def get_consumption_by_type(_drinks_df, data_version):
+    """Konsum nach Getränkeart"""
+    consumption = _drinks_df.groupby('type').agg(
+        Anzahl=('type', 'size'),
+        Menge_ml=('volume', 'sum'),
+        Alkohol_g=('pure_alcohol', 'sum')
+    )
+    return consumption.sort_values('Anzahl', ascending=False)
+
+@st.cache_data(max_entries=20)
+def get_gender_averages(_drinks_df, data_version):
+    """Durchschnittlicher Konsum pro Person nach Geschlecht"""
+    per_person = _drinks_df.groupby(['gender', 'person']).agg(
+        Getränke=('type', 'size'),
+        Alkohol_g=('pure_alcohol', 'sum')
+    )
+    averages = per_person.groupby(level='gender').mean()
+    averages['Personen'] = per_person.groupby(level='gender').size()
+    return averages
+
+@st.cache_data(max_entries=20)
+def get_leaderboard_over_time(_drinks_df, data_version):
+    """Kumulierte Getränke pro Teilnehmer im Zeitverlauf"""
+    buckets = _drinks_df['datetime'].dt.floor(ANALYTICS_BUCKET)
+    counts = _drinks_df.groupby([buckets, 'person']).size().unstack(fill_value=0)
+    full_range = pd.date_range(counts.index.min(), counts.index.max(), freq=ANALYTICS_BUCKET)
+    return counts.reindex(full_range, fill_value=0).cumsum()
+
+# Party über den Query-Parameter auswählen (?party=<id>), sonst die der Session
+party_id = st.query_params.get("party") or st.session_state.party_id or DEFAULT_PARTY_ID
+if get_party_config(party_id) is None:
+    st.error(f"Unbekannte Party: {party_id}")
+    st.stop()
+st.session_state.party_id = party_id
+party = get_party()
+start_party_watcher()
 
 # Hauptnavigation am Anfang der App
-st.title("🎉 Silvester Party 2024")
+st.title(f"🎉 {party.config['title']}")
 
 # Navigation als Buttons
-col1, col2, col3, col4 = st.columns(4)
+col1, col2, col3, col4, col5 = st.columns(5)
 with col1:
     if st.button("📊", key="nav_dashboard", help="Dashboard"):
         st.session_state.current_page = "Dashboard"
@@ -394,9 +1235,16 @@ with col3:
 with col4:
     if st.button("📸", key="nav_memories", help="Memories"):
         st.session_state.current_page = "Memories"
+with col5:
+    if st.button("📈", key="nav_analytics", help="Analyse"):
+        st.session_state.current_page = "Analyse"
 
 st.divider()
 
+# Live-Updates gibt es nur auf dem Dashboard, andere Seiten bleiben ungestört
+if st.session_state.current_page != "Dashboard":
+    get_party_channel().unsubscribe(get_session_id())
+
 # Seiteninhalt basierend auf Auswahl
 if st.session_state.current_page == "Dashboard":
     main_col, feed_col = st.columns([2, 1])
@@ -407,7 +1255,7 @@ if st.session_state.current_page == "Dashboard":
         # Party Statistiken
         col1, col2, col3, col4 = st.columns(4)
         
-        duration_mins = int((time.time() - st.session_state.party_start_time) / 60)
+        duration_mins = int((time.time() - party.party_start_time) / 60)
         if duration_mins < 60:
             duration = f"{duration_mins} Minuten"
         else:
@@ -418,21 +1266,21 @@ if st.session_state.current_page == "Dashboard":
         with col1:
             st.metric("Party Dauer", duration)
         
-        total_drinks = sum(len(p.get('drinks', [])) for p in st.session_state.participants.values())
+        total_drinks = len(get_drinks_df(party)[0])
         with col2:
             st.metric("Getränke gesamt", total_drinks)
         
         genders = {'männlich': 0, 'weiblich': 0}
-        for p in st.session_state.participants.values():
+        for p in list(party.participants.values()):
             genders[p['gender']] += 1
         gender_stats = f"🙋‍♀️ {genders['weiblich']}, 🙋‍♂️ {genders['männlich']}"
         with col3:
             st.metric("Geschlechter", gender_stats)
 
-        if st.session_state.participants:
+        if party.participants:
             total_bac = sum(calculate_bac(p['weight'], p['gender'], p['drinks']) 
-                           for p in st.session_state.participants.values())
-            avg_bac = total_bac / len(st.session_state.participants)
+                           for p in list(party.participants.values()))
+            avg_bac = total_bac / len(party.participants)
         else:
             avg_bac = 0
         with col4:
@@ -441,7 +1289,7 @@ if st.session_state.current_page == "Dashboard":
         # Rankings
         st.subheader("🏆 Party Rankings")
         
-        rankings = get_participant_rankings()
+        rankings = get_participant_rankings(party)
         
         if rankings:
             st.write("### 🔝 Party Champions")
@@ -474,16 +1322,20 @@ if st.session_state.current_page == "Dashboard":
             st.info("Noch keine Teilnehmer auf der Party.")
     
     with feed_col:
-        show_activity_feed()
+        show_activity_feed(party)
         with st.expander("Feed Einstellungen"):
-            if st.checkbox("Auto-Refresh", value=True):
-                time.sleep(30)
-                st.rerun()
+            # Statt regelmäßig neu zu laden, wird die Session bei Änderungen geweckt
+            if st.checkbox("Live-Updates", value=True):
+                get_party_channel().subscribe(party.party_id, get_session_id())
+                st.caption(f"🟢 Live - Stand #{get_party_channel().version(party.party_id)}")
+            else:
+                get_party_channel().unsubscribe(get_session_id())
 
 elif st.session_state.current_page == "Teilnehmer":
     st.header("👥 Teilnehmer hinzufügen")
     
-    with st.form(key="new_participant_form"):
+    participant_key = get_submission_key('new_participant')
+    with st.form(key=f"new_participant_form_{participant_key}"):
         name = st.text_input("Name")
         instagram = st.text_input("Instagram Profil URL (optional)")
         col1, col2 = st.columns(2)
@@ -500,26 +1352,46 @@ elif st.session_state.current_page == "Teilnehmer":
         if st.form_submit_button("Teilnehmer hinzufügen 👋"):
             if name.strip() == "":
                 st.error("Bitte gib einen Namen ein!")
-            elif name in st.session_state.participants:
+            elif name in party.participants:
                 st.error("Teilnehmer existiert bereits!")
-            else:
-                st.session_state.participants[name] = {
+            elif claim_submission(party, participant_key):
+                rotate_submission_key('new_participant')
+                party.participants[name] = {
                     'weight': weight,
                     'gender': gender,
                     'status': status,
                     'instagram': instagram,
                     'drinks': []
                 }
-                add_activity('join', {
+                add_activity(party, 'join', {
                     'person': name
                 })
-                save_data()
+                save_data(party)
                 st.success(f"Willkommen auf der Party, {name}! 🎉")
                 st.balloons()
 
-    if st.session_state.participants:
+    with st.expander("📥 Teilnehmer per CSV importieren"):
+        st.caption("Spalten: name, weight, gender, status, instagram (optional)")
+        participants_file = st.file_uploader("CSV-Datei mit Teilnehmern", 
+                                             type=['csv'], 
+                                             key="participants_import_file")
+        # Jede hochgeladene Datei kann nur einmal importiert werden
+        import_key = f"participants_import:{participants_file.file_id}" if participants_file else None
+        if participants_file and is_submission_claimed(party, import_key):
+            st.info("Diese Datei wurde bereits importiert.")
+        elif participants_file and st.button("Teilnehmer importieren 👥", key="participants_import_button"):
+            new_participants, errors = parse_participant_import(party, participants_file)
+            if errors:
+                st.error("Import abgebrochen - es wurde nichts gespeichert:")
+                for error in errors:
+                    st.write(f"- {error}")
+            elif claim_submission(party, import_key):
+                import_participants(party, new_participants)
+                st.success(f"{len(new_participants)} Teilnehmer importiert! 🎉")
+
+    if party.participants:
         st.header("Teilnehmerliste")
-        for name, data in st.session_state.participants.items():
+        for name, data in list(party.participants.items()):
             col1, col2 = st.columns([3, 1])
             with col1:
                 gender_icon = "🙋‍♂️" if data['gender'] == 'männlich' else "🙋‍♀️"
@@ -530,8 +1402,9 @@ elif st.session_state.current_page == "Teilnehmer":
                 st.write(display_text)
             with col2:
                 if st.button("❌", key=f"remove_{name}"):
-                    del st.session_state.participants[name]
-                    save_data()
+                    party.participants.pop(name, None)
+                    drop_drink_rows(party, name)
+                    save_data(party)
                     st.success(f"{name} wurde von der Party entfernt.")
                     st.rerun()
 
@@ -539,15 +1412,15 @@ elif st.session_state.current_page == "Teilnehmer":
 elif st.session_state.current_page == "Getränke":
     st.header("🍺 Getränke verwalten")
     
-    if not st.session_state.participants:
+    if not party.participants:
         st.warning("Füge zuerst Teilnehmer hinzu!")
     else:
-        tab1, tab2, tab3 = st.tabs(["Standard Getränk", "Custom Getränk", "Getränke verwalten"])
+        tab1, tab2, tab3, tab4 = st.tabs(["Standard Getränk", "Custom Getränk", "Getränke verwalten", "Import"])
         
         with tab1:
             st.subheader("Standard Getränk hinzufügen")
             name = st.selectbox("Teilnehmer auswählen", 
-                              list(st.session_state.participants.keys()),
+                              list(party.participants.keys()),
                               key="add_standard_drink_participant")
             
             # Getränkeauswahl mit Tooltip
@@ -563,28 +1436,33 @@ elif st.session_state.current_page == "Getränke":
                 - Alkohol: {drink_info['alcohol_content']*100:.1f}%
                 """)
             
-            if st.button("Standard Getränk eintragen"):
-                st.session_state.participants[name]['drinks'].append({
+            standard_key = get_submission_key('standard_drink')
+            if (st.button("Standard Getränk eintragen", key=f"standard_drink_{standard_key}")
+                    and claim_submission(party, standard_key)):
+                rotate_submission_key('standard_drink')
+                new_drink = {
                     'type': drink_type,
                     'time': time.time(),
                     'custom': False
-                })
-                person = st.session_state.participants[name]
+                }
+                party.participants[name]['drinks'].append(new_drink)
+                append_drink_row(party, name, new_drink)
+                person = party.participants[name]
                 current_bac = calculate_bac(person['weight'], person['gender'], person['drinks'])
-                add_activity('drink', {
+                add_activity(party, 'drink', {
                     'person': name,
                     'drink': drink_type,
                     'bac': current_bac
                 })
-                check_party_milestones()
-                save_data()
+                check_party_milestones(party)
+                save_data(party)
                 st.success(f"Getränk wurde eingetragen! Aktueller Promillewert: {format_bac(current_bac)}‰ 🍻")
                 st.balloons()
 
         with tab2:
             st.subheader("Custom Getränk hinzufügen")
             name = st.selectbox("Teilnehmer auswählen", 
-                              list(st.session_state.participants.keys()),
+                              list(party.participants.keys()),
                               key="add_custom_drink_participant")
             
             col1, col2 = st.columns(2)
@@ -636,27 +1514,31 @@ elif st.session_state.current_page == "Getränke":
                                                value=float(default_alcohol),
                                                step=0.1)
                 
-            if st.button("Custom Getränk eintragen"):
+            custom_key = get_submission_key('custom_drink')
+            if st.button("Custom Getränk eintragen", key=f"custom_drink_{custom_key}"):
                 if not custom_name:
                     st.error("Bitte gib einen Namen für das Getränk ein!")
-                else:
+                elif claim_submission(party, custom_key):
+                    rotate_submission_key('custom_drink')
                     custom_drink_type = f"Custom: {custom_name}"
-                    st.session_state.participants[name]['drinks'].append({
+                    new_drink = {
                         'type': custom_drink_type,
                         'time': time.time(),
                         'custom': True,
                         'alcohol_content': custom_alcohol / 100,
                         'volume': custom_volume
-                    })
-                    person = st.session_state.participants[name]
+                    }
+                    party.participants[name]['drinks'].append(new_drink)
+                    append_drink_row(party, name, new_drink)
+                    person = party.participants[name]
                     current_bac = calculate_bac(person['weight'], person['gender'], person['drinks'])
-                    add_activity('drink', {
+                    add_activity(party, 'drink', {
                         'person': name,
                         'drink': custom_drink_type,
                         'bac': current_bac
                     })
-                    check_party_milestones()
-                    save_data()
+                    check_party_milestones(party)
+                    save_data(party)
                     st.success(f"Custom Getränk wurde eingetragen! Aktueller Promillewert: {format_bac(current_bac)}‰ 🍻")
                     st.balloons()
                     st.session_state.barcode_result = None
@@ -665,12 +1547,12 @@ elif st.session_state.current_page == "Getränke":
             st.subheader("Getränke verwalten")
             selected_participant = st.selectbox(
                 "Teilnehmer auswählen",
-                list(st.session_state.participants.keys()),
+                list(party.participants.keys()),
                 key="manage_drinks_participant"
             )
             
             if selected_participant:
-                person = st.session_state.participants[selected_participant]
+                person = party.participants[selected_participant]
                 drinks = person['drinks']
                 
                 if drinks:
@@ -685,8 +1567,9 @@ elif st.session_state.current_page == "Getränke":
                             drink_time = datetime.fromtimestamp(drink['time'])
                             st.write(f"🕒 {drink_time.strftime('%H:%M Uhr')}")
                         with col3:
-                            if st.button("❌", key=f"remove_drink_{idx}"):
-                                if remove_drink(selected_participant, idx):
+                            # Schlüssel an das Getränk binden, damit ein Doppel-Tipp nicht das nächste trifft
+                            if st.button("❌", key=f"remove_drink_{selected_participant}_{idx}_{drink['time']}"):
+                                if remove_drink(party, selected_participant, idx, drink['time']):
                                     st.success("Getränk wurde entfernt!")
                                     updated_bac = calculate_bac(
                                         person['weight'], 
@@ -698,6 +1581,29 @@ elif st.session_state.current_page == "Getränke":
                 else:
                     st.info("Noch keine Getränke eingetragen.")
 
+        with tab4:
+            st.subheader("Getränke nachtragen")
+            st.caption(
+                "Spalten: name, type, time (HH:MM oder Datum mit Uhrzeit, z.B. 01.01.2025 00:30), "
+                "volume und alcohol_content (%) für Custom Getränke"
+            )
+            drinks_file = st.file_uploader("CSV-Datei mit Getränken", 
+                                           type=['csv'], 
+                                           key="drinks_import_file")
+            # Jede hochgeladene Datei kann nur einmal importiert werden
+            import_key = f"drinks_import:{drinks_file.file_id}" if drinks_file else None
+            if drinks_file and is_submission_claimed(party, import_key):
+                st.info("Diese Datei wurde bereits importiert.")
+            elif drinks_file and st.button("Getränke importieren 🍻", key="drinks_import_button"):
+                new_drinks, errors = parse_drink_import(party, drinks_file)
+                if errors:
+                    st.error("Import abgebrochen - es wurde nichts gespeichert:")
+                    for error in errors:
+                        st.write(f"- {error}")
+                elif claim_submission(party, import_key):
+                    import_drinks(party, new_drinks)
+                    st.success(f"{len(new_drinks)} Getränke nachgetragen! 🍻")
+
 elif st.session_state.current_page == "Memories":
     st.header("📸 Party Memories")
     
@@ -712,7 +1618,7 @@ elif st.session_state.current_page == "Memories":
             
             if st.button("Speichern 💾"):
                 if memory_title:
-                    if upload_memory(uploaded_file, memory_title):
+                    if upload_memory(party, uploaded_file, memory_title):
                         st.success("Erinnerung gespeichert! 🎉")
                         st.balloons()
                 else:
@@ -720,7 +1626,7 @@ elif st.session_state.current_page == "Memories":
 
     st.subheader("🖼️ Party Galerie")
     
-    memories = get_memories()
+    memories = get_memories(party)
     if memories:
         cols = st.columns(3)
         for idx, memory in enumerate(memories):
@@ -733,15 +1639,75 @@ elif st.session_state.current_page == "Memories":
     else:
         st.info("Noch keine Erinnerungen hochgeladen!")
 
+elif st.session_state.current_page == "Analyse":
+    st.header("📈 Party Analyse")
+    
+    drinks_df, data_version = get_drinks_df(party)
+    
+    if drinks_df.empty:
+        st.info("Noch keine Getränke eingetragen - hier gibt es bald Statistiken! 📊")
+    else:
+        st.subheader("🕒 Getränke pro 15 Minuten")
+        st.bar_chart(get_drinks_per_bucket(drinks_df, data_version))
+        
+        st.subheader("🍹 Konsum nach Getränkeart")
+        consumption = get_consumption_by_type(drinks_df, data_version)
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            st.bar_chart(consumption['Anzahl'])
+        with col2:
+            st.dataframe(consumption.round(1))
+        
+        st.subheader("🙋 Durchschnitt nach Geschlecht")
+        gender_averages = get_gender_averages(drinks_df, data_version)
+        gender_cols = st.columns(len(gender_averages))
+        for col, (gender, row) in zip(gender_cols, gender_averages.iterrows()):
+            gender_icon = "🙋‍♂️" if gender == 'männlich' else "🙋‍♀️"
+            with col:
+                st.metric(
+                    f"{gender_icon} Ø Getränke",
+                    f"{row['Getränke']:.1f}".replace('.', ',')
+                )
+                st.caption(
+                    f"Ø {row['Alkohol_g']:.0f} g Alkohol · "
+                    f"{int(row['Personen'])} Personen mit Getränken"
+                )
+        
+        st.subheader("🏁 Rangliste im Zeitverlauf")
+        leaderboard = get_leaderboard_over_time(drinks_df, data_version)
+        st.line_chart(leaderboard)
+        leaders = leaderboard.idxmax(axis=1).rename("Führend")
+        leaders.index = leaders.index.strftime('%H:%M')
+        with st.expander("Führende pro Intervall"):
+            st.dataframe(leaders)
+    
+    st.subheader("📤 Party exportieren")
+    export_format = st.radio("Format", ["CSV", "Parquet"], horizontal=True)
+    if st.button("Export vorbereiten", key="export_button"):
+        st.download_button(
+            "⬇️ Export herunterladen",
+            data=export_party(party, export_format),
+            file_name=f"party_export_{datetime.now().strftime('%Y%m%d_%H%M')}.zip",
+            mime="application/zip"
+        )
+
 # Admin-Bereich mit Passwortschutz
 st.markdown("---")
 with st.expander("🔑 Admin-Bereich"):
     st.warning("⚠️ Dieser Bereich ist nur für Administratoren!")
+    st.caption(f"Party-ID: {party.party_id} · {len(get_party_cache())} Partys im Speicher")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Ungespeicherte Änderungen", party.pending_writes)
+    with col2:
+        st.metric("Partys in der Schreib-Warteschlange", get_party_writer().queue_depth())
     reset_password = st.text_input("Admin-Passwort:", type="password")
-    if st.button("🔄 Party zurücksetzen", key="reset_button"):
+    reset_key = get_submission_key('reset_party')
+    if (st.button("🔄 Party zurücksetzen", key=f"reset_button_{reset_key}")
+            and claim_submission(party, reset_key)):
+        rotate_submission_key('reset_party')
         if reset_password:
-            if reset_party(reset_password):
-                st.session_state.activity_feed = []
+            if reset_party(party, reset_password):
                 st.success("Party wurde erfolgreich zurückgesetzt!")
                 with st.spinner("Neustart..."):
                     time.sleep(2)
@@ -760,4 +1726,8 @@ st.warning("""
 - Trinke verantwortungsvoll und kenne deine Grenzen.
 
 🚨 **Im Notfall: Notruf 112** - Zögere nicht, Hilfe zu holen! 🚨
-""")
\ No newline at end of file
+""")
+
+# Live-Updates, die während dieses Laufs eingetroffen sind, jetzt nachholen
+if get_party_channel().take_deferred(get_session_id()):
+    st.rerun()
\ No newline at end of file